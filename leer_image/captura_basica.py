@@ -11,10 +11,25 @@ import cv2
 import depthai as dai
 import numpy as np
 
+from _device import device_context
+from _display import KEY_Q, KEY_S, sondear_tecla
+from _guardado import encolar_guardado
+from _overlay import componer, dibujar_texto
+from _prioridad import fijar_prioridad
+
+# Con OpenCL disponible, cv2.UMat empuja putText/add/imshow a la iGPU
+try:
+    _USAR_OPENCL = cv2.ocl.haveOpenCL()
+except Exception:
+    _USAR_OPENCL = False
+
 def capture_image():
     """
     Captura una imagen desde la cámara OAK-4D R9
     """
+    # Anclar el bucle de captura a los núcleos de rendimiento (best effort)
+    fijar_prioridad()
+
     # Crear pipeline de DepthAI
     pipeline = dai.Pipeline()
     
@@ -26,17 +41,14 @@ def capture_image():
     cam_rgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_720_P)
     cam_rgb.setFps(30)
     
-    # Crear salida para el stream de video
-    video_out = pipeline.create(dai.node.VideoEncoder)
-    video_out.setDefaultProfilePreset(cam_rgb.getFps(), dai.VideoEncoderProperties.Profile.MJPEG)
-    
     # Configurar salida XLink
     xout = pipeline.create(dai.node.XLinkOut)
     xout.setStreamName("video")
-    
-    # Conectar nodos
-    cam_rgb.video.link(video_out.input)
-    video_out.bitstream.link(xout.input)
+
+    # Conectar la salida de video (NV12) directamente al host: para una
+    # vista previa local el viaje encode → decode es trabajo perdido.
+    # DepthAI entrega el frame listo con getCvFrame().
+    cam_rgb.video.link(xout.input)
     
     # Buscar dispositivo específico por número de serie
     device_info = None
@@ -54,12 +66,12 @@ def capture_image():
     try:
         # Si encontramos el dispositivo específico, usarlo; sino, usar el primero disponible
         if device_info:
-            with dai.Device(pipeline, device_info) as device:
+            with device_context(pipeline, device_info) as device:
                 print(f"Conectado a la cámara OAK-4D R9 (Serial: {device.getMxId()})")
                 _run_capture_loop(device)
         else:
             print("Dispositivo específico no encontrado, intentando con el primer dispositivo disponible...")
-            with dai.Device(pipeline) as device:
+            with device_context(pipeline) as device:
                 print(f"Conectado a dispositivo: {device.getMxId()}")
                 _run_capture_loop(device)
     
@@ -79,13 +91,30 @@ def capture_image():
     finally:
         cv2.destroyAllWindows()
 
+def _crear_overlay_estatico(shape):
+    """
+    Rasteriza una sola vez el texto fijo del overlay en un lienzo negro.
+    En el bucle solo se compone con cv2.add, evitando volver a dibujar
+    los mismos glifos Hershey en cada frame.
+    """
+    overlay = np.zeros(shape, dtype=np.uint8)
+    cv2.putText(overlay, "OAK-4D R9 - Serial: 2533390442", (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(overlay, "IP: 192.168.200.126", (10, 60),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, "Presiona 'q' para salir, 's' para capturar",
+               (10, shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return overlay
+
 def _run_capture_loop(device):
     """
     Ejecuta el bucle principal de captura
     """
     # Cola de salida para frames de video
-    q_video = device.getOutputQueue(name="video", maxSize=4, blocking=False)
-    
+    # maxSize=1: la cola del host retiene solo el frame mas reciente,
+    # acotando la latencia de la vista en vivo a <= 1 periodo de frame
+    q_video = device.getOutputQueue(name="video", maxSize=1, blocking=False)
+
     print("\n=== CÁMARA OAK-4D R9 ACTIVA ===")
     print("Mostrando vista previa...")
     print("Controles:")
@@ -94,44 +123,80 @@ def _run_capture_loop(device):
     print("=====================================")
     
     capture_count = 0
-    
+    overlay_estatico = None
+
+    # Descarte adaptativo: si el dibujado no sigue el ritmo de la cámara
+    # (hay frames atrasados que drenar de forma sostenida), se muestra
+    # solo 1 de cada `salto` frames hasta recuperar el paso, y se vuelve
+    # a 1 cuando la cola llega vacía de forma sostenida.
+    salto = 1
+    ticks_atrasados = 0
+    ticks_al_dia = 0
+    indice_frame = 0
+
     while True:
         in_video = q_video.get()  # Obtener frame
-        
+        # Descartar frames atrasados: quedarse solo con el más reciente
+        # para que la latencia no crezca si la visualización se atrasa
+        descartados = 0
+        while q_video.has():
+            mas_nuevo = q_video.tryGet()
+            if mas_nuevo is not None:
+                in_video = mas_nuevo
+                descartados += 1
+
+        # Ajustar el salto según la presión observada en la cola
+        if descartados > 0:
+            ticks_al_dia = 0
+            ticks_atrasados += 1
+            if ticks_atrasados >= 15 and salto < 8:
+                salto *= 2
+                ticks_atrasados = 0
+        else:
+            ticks_atrasados = 0
+            ticks_al_dia += 1
+            if ticks_al_dia >= 15 and salto > 1:
+                salto //= 2
+                ticks_al_dia = 0
+
         if in_video is not None:
-            # Decodificar el frame MJPEG
-            frame_data = in_video.getData()
-            frame = cv2.imdecode(np.frombuffer(frame_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            # Convertir directamente a frame OpenCV (sin decodificar JPEG)
+            frame = in_video.getCvFrame()
             
             if frame is not None:
-                # Agregar información en la imagen
-                cv2.putText(frame, "OAK-4D R9 - Serial: 2533390442", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, "IP: 192.168.200.126", (10, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                cv2.putText(frame, f"Capturas: {capture_count}", (10, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                cv2.putText(frame, "Presiona 'q' para salir, 's' para capturar", 
-                           (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                # Mostrar la imagen
-                cv2.imshow("OAK-4D R9 Camera", frame)
-                
-                # Manejar teclas
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
+                indice_frame += 1
+                mostrar = (indice_frame % salto == 0)
+
+                # Manejar teclas ANTES de componer (también en frames
+                # saltados, para no perder capturas ni la salida con 'q'
+                # bajo carga): la captura toma siempre el frame aún
+                # limpio, sin depender de si este tick se dibuja o no
+                key = sondear_tecla() & 0xFF
+                if key == KEY_Q:
                     break
-                elif key == ord('s'):
-                    # Capturar imagen
+                elif key == KEY_S:
+                    # Capturar imagen (el guardado ocurre en el hilo de fondo)
                     import time
                     timestamp = time.strftime("%Y%m%d_%H%M%S")
                     filename = f"captura_oak4d_{timestamp}.jpg"
-                    cv2.imwrite(filename, frame)
+                    encolar_guardado(filename, frame)
                     capture_count += 1
-                    print(f"✓ Imagen guardada: {filename}")
+
+                if mostrar:
+                    # Componer el texto fijo pre-rasterizado y dibujar solo el dinámico
+                    if overlay_estatico is None or overlay_estatico.shape != frame.shape:
+                        overlay_estatico = _crear_overlay_estatico(frame.shape)
+                    # Con OpenCL la composicion y el texto se hacen en la iGPU
+                    lienzo = cv2.UMat(frame) if _USAR_OPENCL else frame
+                    componer(lienzo, overlay_estatico)
+                    dibujar_texto(lienzo, f"Capturas: {capture_count}", (10, 90),
+                                  0.6, (255, 255, 255), 2)
+
+                    # Mostrar la imagen (imshow acepta UMat sin copia extra)
+                    cv2.imshow("OAK-4D R9 Camera", lienzo)
         else:
-            # Pequeña pausa si no hay frame disponible
-            cv2.waitKey(1)
+            # Procesar eventos de la GUI si no hay frame disponible
+            sondear_tecla()
 
 if __name__ == "__main__":
     print("=== Programa de captura básica OAK-4D R9 ===")
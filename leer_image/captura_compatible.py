@@ -11,6 +11,29 @@ import cv2
 import depthai as dai
 import numpy as np
 
+from _device import device_context
+from _display import KEY_Q, KEY_S, sondear_tecla
+from _guardado import encolar_guardado
+
+def _crear_overlay_estatico(shape):
+    """
+    Rasteriza una sola vez el texto fijo del overlay en un lienzo negro.
+    En el bucle solo se compone con cv2.add, evitando volver a dibujar
+    los mismos glifos Hershey en cada frame.
+    """
+    overlay = np.zeros(shape, dtype=np.uint8)
+    height, width = shape[:2]
+    cv2.putText(overlay, "OAK-4D R9 - Serial: 2533390442", (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(overlay, "IP: 192.168.200.126", (10, 70),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, f"Resolucion: {width}x{height}", (10, 150),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(overlay, "Presiona 'q'=salir, 's'=capturar",
+               (10, height - 20),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return overlay
+
 def capture_image_simple():
     """
     Captura una imagen desde la cámara OAK-4D R9 usando método simplificado
@@ -37,7 +60,7 @@ def capture_image_simple():
     
     try:
         # Conectar al dispositivo de forma simple
-        with dai.Device() as device:
+        with device_context() as device:
             print(f"\n🎥 Conectado exitosamente a la cámara OAK-4D R9")
             print("=== INICIANDO CAPTURA ===")
             
@@ -64,55 +87,51 @@ def capture_image_simple():
                 
                 # Iniciar pipeline
                 device.startPipeline(pipeline)
-                q_rgb = device.getOutputQueue("rgb")
+                # maxSize=1, sin bloqueo: la vista en vivo solo necesita
+                # el frame mas reciente
+                q_rgb = device.getOutputQueue("rgb", maxSize=1, blocking=False)
                 
                 print("✓ Pipeline iniciado correctamente")
                 print("Presiona 'q' para salir, 's' para capturar imagen")
                 
                 capture_count = 0
-                
+                overlay_estatico = None
+
                 while True:
                     # Obtener frame
                     in_rgb = q_rgb.get()
+                    # Descartar frames atrasados: procesar solo el más reciente
+                    while q_rgb.has():
+                        mas_nuevo = q_rgb.tryGet()
+                        if mas_nuevo is not None:
+                            in_rgb = mas_nuevo
                     frame = in_rgb.getCvFrame()
-                    
-                    # Agregar información
-                    cv2.putText(frame, "OAK-4D R9 - Serial: 2533390442", (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    cv2.putText(frame, "IP: 192.168.200.126", (10, 70), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.putText(frame, f"Capturas: {capture_count}", (10, 110), 
+
+                    # Componer el texto fijo pre-rasterizado y dibujar solo el dinámico
+                    if overlay_estatico is None or overlay_estatico.shape != frame.shape:
+                        overlay_estatico = _crear_overlay_estatico(frame.shape)
+                    cv2.add(frame, overlay_estatico, dst=frame)
+                    cv2.putText(frame, f"Capturas: {capture_count}", (10, 110),
                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Mostrar resolución
-                    height, width = frame.shape[:2]
-                    cv2.putText(frame, f"Resolucion: {width}x{height}", (10, 150), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                    
-                    # Instrucciones
-                    cv2.putText(frame, "Presiona 'q'=salir, 's'=capturar", 
-                               (10, frame.shape[0] - 20), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                    
+
                     # Mostrar imagen
                     cv2.imshow("OAK-4D R9 - Captura en Vivo", frame)
                     
                     # Procesar teclas
-                    key = cv2.waitKey(1) & 0xFF
+                    key = sondear_tecla() & 0xFF
                     
-                    if key == ord('q'):
+                    if key == KEY_Q:
                         print("👋 Saliendo...")
                         break
-                    elif key == ord('s'):
-                        # Capturar imagen
+                    elif key == KEY_S:
+                        # Capturar imagen (el guardado ocurre en el hilo de fondo)
                         import time
                         timestamp = time.strftime("%Y%m%d_%H%M%S")
                         filename = f"captura_oak4d_{timestamp}.jpg"
-                        
-                        # Guardar con alta calidad
-                        cv2.imwrite(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+                        encolar_guardado(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
                         capture_count += 1
-                        print(f"📸 Imagen {capture_count} guardada: {filename}")
+                        print(f"📸 Imagen {capture_count} encolada: {filename}")
                         
             except Exception as pipeline_error:
                 print(f"Error en pipeline: {pipeline_error}")
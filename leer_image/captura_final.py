@@ -10,13 +10,53 @@ IP: 192.168.200.126
 import cv2
 import depthai as dai
 import numpy as np
+import os
+
+from _device import device_context
+from _display import (KEY_ESPACIO, KEY_Q, KEY_Q_MAY, KEY_S, KEY_S_MAY,
+                      crear_visor)
+from _guardado import encolar_guardado
+from _overlay import componer, dibujar_texto
+from _prioridad import fijar_prioridad
+from shared_ring import SharedRing
+
+# Con OpenCL disponible, cv2.UMat empuja putText/add/imshow a la iGPU
+try:
+    _USAR_OPENCL = cv2.ocl.haveOpenCL()
+except Exception:
+    _USAR_OPENCL = False
+
+def _crear_overlay_estatico(shape):
+    """
+    Rasteriza una sola vez el texto fijo del overlay en un lienzo negro.
+    En el bucle solo se compone con cv2.add, evitando volver a dibujar
+    los mismos glifos Hershey en cada frame.
+    """
+    overlay = np.zeros(shape, dtype=np.uint8)
+    height, width = shape[:2]
+    cv2.putText(overlay, "OAK-4D R9 CONECTADO", (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+    cv2.putText(overlay, "Serial: 2533390442", (10, 70),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, "IP: 192.168.200.126", (10, 110),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, f"Resolucion: {width}x{height}", (10, 190),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(overlay, "Controles: Q=salir | S/ESPACIO=capturar",
+               (10, height - 20),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+    return overlay
 
 def main():
     """
     Función principal de captura
     """
     print("🚀 Iniciando programa de captura OAK-4D R9...")
-    
+
+    # Anclar el bucle de captura a los núcleos de rendimiento (best effort)
+    fijar_prioridad()
+
+
     # Verificar dispositivos disponibles
     devices = dai.Device.getAllAvailableDevices()
     if len(devices) == 0:
@@ -49,11 +89,13 @@ def main():
         return False
     
     # Conectar al dispositivo y ejecutar
+    anillo = None
+    visor = None
     try:
         # Usar el dispositivo específico si está disponible
         device_info = devices[0]
         
-        with dai.Device(pipeline, device_info) as device:
+        with device_context(pipeline, device_info) as device:
             print("🎥 ¡CONECTADO A OAK-4D R9!")
             print("=" * 40)
             print("Controles de captura:")
@@ -62,66 +104,79 @@ def main():
             print("- ESPACIO: Capturar y guardar imagen")
             print("=" * 40)
             
-            # Obtener cola de salida RGB
-            q_rgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
+            # Obtener cola de salida RGB (maxSize=1: solo el frame mas
+            # reciente, la profundidad extra solo compraba latencia)
+            q_rgb = device.getOutputQueue(name="rgb", maxSize=1, blocking=False)
             
+            # Visor GL si moderngl/glfw estan instalados (un DMA por
+            # frame en vez de la conversion y copia de GTK); si no,
+            # cv2.imshow con la misma interfaz
+            visor = crear_visor("OAK-4D R9 - Captura en Vivo")
+
             capture_count = 0
-            
+            overlay_estatico = None
+
+            # Con SHM_RING definido se publica cada frame en un anillo de
+            # memoria compartida: los visores del mismo host lo leen con
+            # un memcpy en vez de re-serializar el stream por sockets.
+            nombre_anillo = os.environ.get("SHM_RING")
+
             while True:
                 # Obtener frame RGB
                 in_rgb = q_rgb.get()
-                
+                # Descartar frames atrasados: procesar solo el más reciente
+                while q_rgb.has():
+                    mas_nuevo = q_rgb.tryGet()
+                    if mas_nuevo is not None:
+                        in_rgb = mas_nuevo
+
                 if in_rgb is not None:
                     # Convertir a formato OpenCV
                     frame = in_rgb.getCvFrame()
-                    
-                    # Información de overlay
-                    cv2.putText(frame, "OAK-4D R9 CONECTADO", (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    cv2.putText(frame, f"Serial: 2533390442", (10, 70), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.putText(frame, f"IP: 192.168.200.126", (10, 110), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    cv2.putText(frame, f"Capturas realizadas: {capture_count}", (10, 150), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Información técnica
-                    height, width = frame.shape[:2]
-                    cv2.putText(frame, f"Resolucion: {width}x{height}", (10, 190), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                    
-                    # Instrucciones en la parte inferior
-                    cv2.putText(frame, "Controles: Q=salir | S/ESPACIO=capturar", 
-                               (10, frame.shape[0] - 20), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-                    
-                    # Mostrar frame
-                    cv2.imshow("OAK-4D R9 - Captura en Vivo", frame)
-                    
-                    # Procesar input del teclado
-                    key = cv2.waitKey(1) & 0xFF
+
+                    # Publicar el frame limpio (sin overlay) en el anillo
+                    if nombre_anillo:
+                        if anillo is None:
+                            anillo = SharedRing(nombre_anillo, frame.nbytes)
+                            print(f"✓ Anillo compartido activo: {nombre_anillo}")
+                        anillo.publicar(frame)
+
+                    # Componer el texto fijo pre-rasterizado y dibujar solo el dinámico
+                    if overlay_estatico is None or overlay_estatico.shape != frame.shape:
+                        overlay_estatico = _crear_overlay_estatico(frame.shape)
+                        # La resolucion es constante por sesion: se cachea
+                        # junto al overlay en vez de releer shape por frame
+                        height, width = frame.shape[:2]
+                    # Con OpenCL la composicion y el texto se hacen en la iGPU
+                    lienzo = cv2.UMat(frame) if _USAR_OPENCL else frame
+                    componer(lienzo, overlay_estatico)
+                    dibujar_texto(lienzo, f"Capturas realizadas: {capture_count}", (10, 150),
+                                  0.6, (255, 255, 255), 2)
+
+                    # Mostrar frame (el visor acepta UMat o ndarray)
+                    visor.mostrar(lienzo)
+
+                    # Procesar input del teclado (de la ventana activa)
+                    key = visor.tecla() & 0xFF
                     
                     # Salir con 'q' o 'Q'
-                    if key == ord('q') or key == ord('Q'):
+                    if key == KEY_Q or key == KEY_Q_MAY:
                         print("👋 Saliendo del programa...")
                         break
                     
                     # Capturar con 's', 'S' o ESPACIO
-                    elif key == ord('s') or key == ord('S') or key == ord(' '):
+                    elif key == KEY_S or key == KEY_S_MAY or key == KEY_ESPACIO:
                         import time
                         timestamp = time.strftime("%Y%m%d_%H%M%S")
                         filename = f"captura_oak4d_{timestamp}.jpg"
-                        
-                        # Guardar imagen con alta calidad
-                        success = cv2.imwrite(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                        
-                        if success:
-                            capture_count += 1
-                            print(f"📸 ¡Imagen {capture_count} guardada exitosamente!")
-                            print(f"   📁 Archivo: {filename}")
-                            print(f"   📏 Resolución: {width}x{height}")
-                        else:
-                            print("❌ Error al guardar la imagen")
+
+                        # Guardar imagen con alta calidad en el hilo de fondo
+                        imagen = lienzo.get() if _USAR_OPENCL else frame
+                        encolar_guardado(filename, imagen, [cv2.IMWRITE_JPEG_QUALITY, 95])
+                        capture_count += 1
+                        print(f"📸 ¡Imagen {capture_count} encolada!")
+                        print(f"   📁 Archivo: {filename}")
+                        print(f"   📏 Resolución: {width}x{height}")
         
         print(f"\n✅ Sesión finalizada")
         print(f"📊 Total de imágenes capturadas: {capture_count}")
@@ -133,6 +188,10 @@ def main():
         return False
     
     finally:
+        if anillo is not None:
+            anillo.cerrar()
+        if visor is not None:
+            visor.cerrar()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
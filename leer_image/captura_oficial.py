@@ -11,17 +11,58 @@ IP: 192.168.200.126
 
 import cv2
 import depthai as dai
+import numpy as np
 import time
+from datetime import timedelta
+
+from _device import get_device
+from _display import (KEY_ESPACIO, KEY_Q, KEY_Q_MAY, KEY_S, KEY_S_MAY,
+                      sondear_tecla)
+from _overlay import dibujar_texto
+from _prioridad import fijar_prioridad
+
+# Tamaño del bloque de HUD: todo el texto (fijo y dinámico) vive en esta
+# franja superior-izquierda para respaldar/restaurar solo el ROI en vez
+# de clonar el frame completo (~MB por cámara por tick).
+ALTO_HUD = 300
+ANCHO_HUD = 560
+
+def _crear_overlay_estatico(shape, name):
+    """
+    Rasteriza una sola vez el texto fijo del HUD de una cámara en un
+    bloque pequeño. En el bucle solo se compone ese ROI con cv2.add,
+    evitando volver a dibujar los mismos glifos Hershey en cada frame.
+    """
+    height, width = shape[:2]
+    alto = min(ALTO_HUD, height)
+    ancho = min(ANCHO_HUD, width)
+    overlay = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    cv2.putText(overlay, f"OAK-4D R9 - Socket: {name}", (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+    cv2.putText(overlay, "Serial: 2533390442", (10, 70),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, "IP: 192.168.200.126", (10, 110),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    cv2.putText(overlay, f"Resolucion: {width}x{height}", (10, 150),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(overlay, "Q=salir | S/ESPACIO=capturar",
+               (10, alto - 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+    return overlay
 
 def main():
     """
     Función principal usando la API oficial de DepthAI V3
     """
     print("🚀 Iniciando captura con API oficial DepthAI V3...")
-    
+
+    # Anclar el bucle de captura a los núcleos de rendimiento (best effort)
+    fijar_prioridad()
+
+
     try:
-        # Crear dispositivo y pipeline (API oficial V3)
-        device = dai.Device()
+        # Dispositivo compartido y pipeline (API oficial V3)
+        device = get_device()
         
         print(f"✓ Dispositivo conectado: {device.getDeviceName()}")
         print(f"✓ Cámaras disponibles: {device.getConnectedCameras()}")
@@ -50,63 +91,109 @@ def main():
             pipeline.start()
             
             capture_count = 0
-            
+            overlays_estaticos = {}
+
+            # Timestamp del HUD cacheado: strftime solo corre al cambiar
+            # el segundo, no una vez por frame por cámara
+            ultimo_segundo = 0
+            texto_tiempo = ""
+
+            # getQueueEvent bloquea una sola vez sobre todas las colas
+            # (fan-in estilo epoll) en lugar de sondear cada una con
+            # has()/get(); si la versión de DepthAI no lo expone se
+            # mantiene el sondeo por cola. El timeout garantiza que un
+            # productor parado no congele el teclado.
+            nombres_colas = list(outputQueues.keys())
+            usar_eventos = hasattr(device, "getQueueEvent")
+
+            # El tipo de mensaje se valida una sola vez por cola (primer
+            # frame); repetir isinstance en cada iteración solo suma
+            # trabajo al bucle caliente.
+            colas_verificadas = set()
+
+            # Último frame visto por socket: persiste entre ticks para
+            # que la captura guarde TODAS las cámaras aunque el evento
+            # de este tick despertara por una sola cola
+            frames = {}
+
             # Bucle principal de captura
             while pipeline.isRunning():
-                frames = {}
-                
-                # Obtener frames de todas las cámaras
-                for name in outputQueues.keys():
-                    queue = outputQueues[name]
-                    if queue.has():
-                        videoIn = queue.get()
-                        assert isinstance(videoIn, dai.ImgFrame)
-                        
+                # El evento solo marca el despertar; después se drenan
+                # todas las colas igualmente
+                if usar_eventos:
+                    try:
+                        device.getQueueEvent(nombres_colas,
+                                             timeout=timedelta(milliseconds=100))
+                    except (RuntimeError, TypeError):
+                        usar_eventos = False
+
+                hubo_frame = False
+                for name in nombres_colas:
+                    queue = outputQueues.get(name)
+                    if queue is not None:
+                        videoIn = queue.tryGet()
+                        if videoIn is None:
+                            continue
+                        hubo_frame = True
+                        # Drenaje apretado: quedarse con el mensaje más reciente
+                        mas_nuevo = queue.tryGet()
+                        while mas_nuevo is not None:
+                            videoIn = mas_nuevo
+                            mas_nuevo = queue.tryGet()
+                        if name not in colas_verificadas:
+                            assert isinstance(videoIn, dai.ImgFrame)
+                            colas_verificadas.add(name)
+
                         # Obtener frame OpenCV
                         frame = videoIn.getCvFrame()
                         frames[name] = frame
-                        
-                        # Agregar información overlay
-                        info_frame = frame.copy()
-                        
-                        # Información del dispositivo
-                        cv2.putText(info_frame, f"OAK-4D R9 - Socket: {name}", (10, 30), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                        cv2.putText(info_frame, f"Serial: 2533390442", (10, 70), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                        cv2.putText(info_frame, f"IP: 192.168.200.126", (10, 110), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                        
-                        # Información técnica
-                        height, width = frame.shape[:2]
-                        cv2.putText(info_frame, f"Resolucion: {width}x{height}", (10, 150), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        cv2.putText(info_frame, f"Capturas: {capture_count}", (10, 190), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        
-                        # Timestamp
-                        timestamp = time.strftime("%H:%M:%S")
-                        cv2.putText(info_frame, f"Tiempo: {timestamp}", (10, 230), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        
-                        # Controles en la parte inferior
-                        cv2.putText(info_frame, "Q=salir | S/ESPACIO=capturar", 
-                                   (10, info_frame.shape[0] - 20), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                        
+
+                        # En vez de clonar el frame completo, se respalda solo
+                        # la franja del HUD, se dibuja encima y se restaura tras
+                        # presentar: el tráfico de memoria queda acotado al ROI.
+                        overlay = overlays_estaticos.get(name)
+                        if overlay is None:
+                            overlay = _crear_overlay_estatico(frame.shape, name)
+                            overlays_estaticos[name] = overlay
+                        alto, ancho = overlay.shape[:2]
+                        roi = frame[:alto, :ancho]
+                        respaldo = roi.copy()
+                        cv2.add(roi, overlay, dst=roi)
+
+                        # Solo el texto dinámico se dibuja en cada frame
+                        dibujar_texto(frame, f"Capturas: {capture_count}", (10, 190),
+                                      0.5, (255, 255, 255), 1)
+                        ahora = int(time.time())
+                        if ahora != ultimo_segundo:
+                            texto_tiempo = time.strftime("%H:%M:%S", time.localtime(ahora))
+                            ultimo_segundo = ahora
+                        dibujar_texto(frame, f"Tiempo: {texto_tiempo}", (10, 230),
+                                      0.5, (255, 255, 255), 1)
+
                         # Mostrar frame con información
-                        cv2.imshow(f"OAK-4D R9 - Camara {name}", info_frame)
-                
+                        cv2.imshow(f"OAK-4D R9 - Camara {name}", frame)
+
+                        # Restaurar la franja: la captura guarda la imagen limpia
+                        frame[:alto, :ancho] = respaldo
+
+                # Sin getQueueEvent el tick entero es no-bloqueante
+                # (tryGet + sondear_tecla): si además no llegó ningún
+                # frame hay que ceder la CPU, o el bucle gira en vacío al
+                # 100% — letal con la prioridad SCHED_FIFO de
+                # fijar_prioridad()
+                if not usar_eventos and not hubo_frame:
+                    time.sleep(0.005)
+
                 # Procesar input del teclado
-                key = cv2.waitKey(1) & 0xFF
+                key = sondear_tecla() & 0xFF
                 
                 # Salir con 'q' o 'Q'
-                if key == ord('q') or key == ord('Q'):
+                if key == KEY_Q or key == KEY_Q_MAY:
                     print("👋 Cerrando aplicación...")
                     break
                 
                 # Capturar con 's', 'S' o ESPACIO
-                elif key == ord('s') or key == ord('S') or key == ord(' '):
+                elif key == KEY_S or key == KEY_S_MAY or key == KEY_ESPACIO:
                     if frames:
                         timestamp = time.strftime("%Y%m%d_%H%M%S")
                         capture_count += 1
@@ -11,6 +11,9 @@ import cv2
 import depthai as dai
 import numpy as np
 
+from _display import KEY_ESPACIO, KEY_Q, KEY_S, sondear_tecla
+from _guardado import encolar_guardado
+
 def capture_image():
     """
     Captura una imagen desde la cámara OAK-4D R9
@@ -77,14 +80,21 @@ def capture_image():
             print("=====================================")
             
             # Cola para recibir frames
-            video_queue = device.getOutputQueue("video", maxSize=4, blocking=False)
+            # maxSize=1: la cola del host guarda solo el frame mas reciente,
+            # acotando la latencia de la vista en vivo a <= 1 periodo de frame
+            video_queue = device.getOutputQueue("video", maxSize=1, blocking=False)
             
             capture_count = 0
             
             while True:
                 # Obtener frame
                 in_video = video_queue.get()
-                
+                # Descartar frames atrasados: procesar solo el más reciente
+                while video_queue.has():
+                    mas_nuevo = video_queue.tryGet()
+                    if mas_nuevo is not None:
+                        in_video = mas_nuevo
+
                 if in_video is not None:
                     # Convertir a OpenCV format
                     frame = in_video.getCvFrame()
@@ -111,21 +121,20 @@ def capture_image():
                     cv2.imshow("OAK-4D R9 Camera Live Feed", frame)
                     
                     # Procesar teclas
-                    key = cv2.waitKey(1) & 0xFF
+                    key = sondear_tecla() & 0xFF
                     
-                    if key == ord('q'):
+                    if key == KEY_Q:
                         print("👋 Saliendo...")
                         break
-                    elif key == ord('s') or key == ord(' '):  # 's' o espacio
-                        # Capturar imagen
+                    elif key == KEY_S or key == KEY_ESPACIO:  # 's' o espacio
+                        # Capturar imagen (el guardado ocurre en el hilo de fondo)
                         import time
                         timestamp = time.strftime("%Y%m%d_%H%M%S")
                         filename = f"captura_oak4d_{timestamp}.jpg"
-                        
-                        # Guardar con alta calidad
-                        cv2.imwrite(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+                        encolar_guardado(filename, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
                         capture_count += 1
-                        print(f"📸 Imagen {capture_count} guardada: {filename}")
+                        print(f"📸 Imagen {capture_count} encolada: {filename}")
     
     except Exception as e:
         print(f"❌ Error al conectar con la cámara: {e}")
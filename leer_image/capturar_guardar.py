@@ -8,9 +8,86 @@ Este script permite capturar imágenes individuales y guardarlas con diferentes
 import cv2
 import depthai as dai
 import numpy as np
+import queue
+import sys
+import threading
 import time
 import os
-from datetime import datetime
+from dataclasses import dataclass
+
+# Asegurar las rutas SIMD de OpenCV (NEON en la Pi, AVX2 en x86) y
+# dimensionar su pool de hilos dejando un núcleo libre para el bucle
+# de captura: cvtColor, resize y el encode se reparten entre los demás
+cv2.setUseOptimized(True)
+cv2.setNumThreads(max(1, (os.cpu_count() or 2) - 1))
+
+# libjpeg-turbo con rutas SIMD (NEON en la Pi) codifica 2-4x más rápido
+# que el libjpeg de algunas ruedas de OpenCV; opcional, con respaldo
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _tj = TurboJPEG()
+    _TURBOJPEG_DISPONIBLE = True
+except Exception:
+    _TURBOJPEG_DISPONIBLE = False
+
+def guardar_jpeg(frame, path, calidad=95):
+    """
+    Codifica en memoria (turbojpeg si está, cv2.imencode si no) y
+    escribe los bytes directo.
+
+    Evita que cv2.imwrite re-resuelva el códec por extensión y abra el
+    archivo en C en cada llamada, y deja los bytes disponibles para otros
+    destinos (red, ring buffer) sin un segundo encode.
+    """
+    if _TURBOJPEG_DISPONIBLE:
+        datos = _tj.encode(frame, quality=calidad, pixel_format=TJPF_BGR)
+    else:
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, calidad])
+        if not ok:
+            return False
+        datos = buf.tobytes()
+    with open(path, 'wb', buffering=0) as f:
+        f.write(datos)
+    return True
+
+# Con numba el predicado de disparo se compila a nativo; la función es
+# trivial, pero en el bucle caliente se evalúa dos veces por frame y el
+# despacho del intérprete desaparece. Sin numba, la misma expresión
+def _toca_disparo(ahora, ultima, periodo):
+    return ahora - ultima >= periodo
+
+try:
+    from numba import njit
+    _toca_disparo = njit(cache=True)(_toca_disparo)
+except ImportError:
+    pass
+
+@dataclass(slots=True)
+class EstadoCaptura:
+    """
+    Estado del bucle de captura en un solo objeto con slots: el acceso a
+    los atributos va por índice fijo en vez de por búsqueda en dict.
+    """
+    continuo: bool = False
+    serie: bool = False
+    serie_num: int = 0
+    capturas: int = 0
+    ultima_captura: float = 0.0
+    ultimo_refresco: float = 0.0
+
+def _marca_tiempo():
+    """
+    Marca AAAAMMDD_HHMMSS_mmm con time.time_ns y f-string.
+
+    Evita el parseo del formato y la adquisición del lock de locale que
+    hace datetime.strftime en cada llamada, dentro del camino crítico de
+    las ráfagas de captura.
+    """
+    ns = time.time_ns()
+    ms = (ns // 1_000_000) % 1000
+    tm = time.localtime(ns // 1_000_000_000)
+    return (f"{tm.tm_year:04d}{tm.tm_mon:02d}{tm.tm_mday:02d}_"
+            f"{tm.tm_hour:02d}{tm.tm_min:02d}{tm.tm_sec:02d}_{ms:03d}")
 
 def capture_and_save():
     """
@@ -31,17 +108,95 @@ def capture_and_save():
     
     xout_rgb.setStreamName("rgb")
     
-    # Configurar cámara RGB para máxima calidad
-    cam_rgb.setPreviewSize(1920, 1080)  # Full HD
-    cam_rgb.setInterleaved(False)
-    cam_rgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.RGB)
+    # Preview pequeño para la UI (el ISP lo genera gratis) y salida
+    # `still` aparte a resolución completa para las capturas: el host ya
+    # no recibe ni procesa 1080p continuo solo para mostrarlo en pantalla
+    cam_rgb.setPreviewSize(640, 360)
+    cam_rgb.setStillSize(1920, 1080)  # Full HD
+    cam_rgb.setVideoSize(1920, 1080)
+    # Intercalado (HWC): permite ver el buffer del preview como ndarray
+    # con np.frombuffer sin reordenar planos ni copiar
+    cam_rgb.setInterleaved(True)
+    # Pedir BGR directamente al ISP: evita una pasada completa de
+    # cvtColor RGB->BGR por frame en el host (~12 MB de ancho de banda
+    # a 1080p que la cámara regala gratis)
+    cam_rgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.BGR)
     cam_rgb.setFps(15)  # Menor FPS para mejor calidad
     
     # Conectar la cámara a la salida
     cam_rgb.preview.link(xout_rgb.input)
-    
-    capture_count = 0
-    
+
+    # Salida still + entrada de control para dispararla bajo demanda
+    xout_still = pipeline.create(dai.node.XLinkOut)
+    xout_still.setStreamName("still")
+    cam_rgb.still.link(xout_still.input)
+    xin_control = pipeline.create(dai.node.XLinkIn)
+    xin_control.setStreamName("control")
+    xin_control.out.link(cam_rgb.inputControl)
+
+    # Codificador MJPEG en el chip de la cámara: los modos continuo y
+    # serie reciben los frames ya comprimidos (JPEG por hardware), con
+    # coste de CPU ~0 en el host y 5-20x menos ancho de banda de enlace
+    encoder = pipeline.create(dai.node.VideoEncoder)
+    encoder.setDefaultProfilePreset(15, dai.VideoEncoderProperties.Profile.MJPEG)
+    encoder.setQuality(95)
+    cam_rgb.video.link(encoder.input)
+    xout_mjpeg = pipeline.create(dai.node.XLinkOut)
+    xout_mjpeg.setStreamName("mjpeg")
+    encoder.bitstream.link(xout_mjpeg.input)
+
+    estado = EstadoCaptura()
+
+    # El encode JPEG (decenas de ms a 1080p) sale del bucle de captura a
+    # un hilo de fondo con cola acotada: los modos continuo y serie dejan
+    # de perder frames de cámara mientras libjpeg trabaja
+    encode_q = queue.Queue(maxsize=8)
+
+    def _guardador():
+        while True:
+            item = encode_q.get()
+            # task_done SIEMPRE se ejecuta y un fallo de guardado (disco
+            # lleno, permisos, turbojpeg) no mata el hilo: sin eso, el
+            # encode_q.join() de la salida se quedaría colgado
+            try:
+                if item is None:
+                    break
+                # msg (si lo hay) mantiene vivo el buffer del dispositivo
+                # hasta que el encode termina; se suelta al salir del tick
+                contenido, destino, msg = item
+                if isinstance(contenido, (bytes, bytearray)):
+                    # Ya viene comprimido del codificador de la cámara
+                    with open(destino, 'wb', buffering=0) as f:
+                        f.write(contenido)
+                else:
+                    guardar_jpeg(contenido, destino)
+            except Exception as e:
+                print(f"❌ Error guardando la captura: {e}")
+            finally:
+                encode_q.task_done()
+
+    threading.Thread(target=_guardador, daemon=True).start()
+
+    def _encolar_captura(frame_pendiente, destino, msg=None):
+        try:
+            # Sin msg que ancle el buffer original hay que copiar; con él
+            # la vista viaja tal cual (cero copias hasta el encode)
+            if msg is None:
+                frame_pendiente = frame_pendiente.copy()
+            encode_q.put_nowait((frame_pendiente, destino, msg))
+            return True
+        except queue.Full:
+            print("⚠️ Cola de guardado llena; captura descartada")
+            return False
+
+    def _encolar_bytes(datos, destino):
+        try:
+            encode_q.put_nowait((datos, destino, None))
+            return True
+        except queue.Full:
+            print("⚠️ Cola de guardado llena; captura descartada")
+            return False
+
     try:
         with dai.Device(pipeline) as device:
             print("Conectado a la cámara OAK-4W")
@@ -54,65 +209,160 @@ def capture_and_save():
             print("- 's': Capturar serie de 5 imágenes")
             print("=" * 50)
             
-            # Cola de salida para frames RGB
-            q_rgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-            
-            continuous_mode = False
-            series_mode = False
-            series_count = 0
-            last_capture_time = time.time()
-            
+            # Cola de salida para frames RGB (maxSize=1: solo el frame más
+            # reciente; la profundidad extra solo acumulaba latencia)
+            q_rgb = device.getOutputQueue(name="rgb", maxSize=1, blocking=False)
+            q_still = device.getOutputQueue(name="still", maxSize=2, blocking=False)
+            q_mjpeg = device.getOutputQueue(name="mjpeg", maxSize=4, blocking=False)
+            q_control = device.getInputQueue("control")
+
+            # Nombres de archivo a la espera de su still correspondiente
+            pendientes = []
+
+            def _disparar_still(destino):
+                ctrl = dai.CameraControl()
+                ctrl.setCaptureStill(True)
+                q_control.send(ctrl)
+                pendientes.append(destino)
+
+            # Sin DISPLAY (ejecución típica por SSH en la Pi) no hay
+            # ventana: las órdenes llegan por stdin desde un hilo daemon
+            # y el bucle no paga el sincronismo con el event loop GUI de
+            # cv2.waitKey en cada frame
+            sin_pantalla = not os.environ.get("DISPLAY")
+            teclas_stdin = queue.Queue()
+            if sin_pantalla:
+                print("ℹ️ Sin DISPLAY: modo consola "
+                      "(ENTER=capturar, c=continuo, s=serie, q=salir)")
+
+                def _leer_stdin():
+                    for linea in sys.stdin:
+                        orden = linea.strip()[:1] or ' '
+                        teclas_stdin.put(ord(orden))
+
+                threading.Thread(target=_leer_stdin, daemon=True).start()
+
+            estado.ultima_captura = time.time()
+            dropped = 0
+            # HUD cacheado: el parche de texto solo se re-rasteriza cuando
+            # cambia el estado, no en cada frame
+            hud_patch = None
+            hud_estado_prev = None
+            ultimo_mjpeg = None
+            # Paquetes MJPEG acumulados de la serie en curso: se escriben
+            # como UN solo archivo .mjpeg contiguo al completarla
+            serie_paquetes = []
+            serie_filename = None
+
             while True:
                 in_rgb = q_rgb.get()
-                
+                # Descartar frames atrasados: procesar solo el más reciente
+                while True:
+                    mas_nuevo = q_rgb.tryGet()
+                    if mas_nuevo is None:
+                        break
+                    in_rgb = mas_nuevo
+                    dropped += 1
+                    if dropped % 100 == 0:
+                        print(f"⚠️ {dropped} frames atrasados descartados (la visualización va lenta)")
+
                 if in_rgb is not None:
-                    # Convertir a OpenCV frame
-                    frame = in_rgb.getCvFrame()
-                    
-                    # Convertir de RGB a BGR para OpenCV
-                    frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                    
-                    # Agregar información de estado
-                    status_text = "LISTO PARA CAPTURAR"
-                    if continuous_mode:
-                        status_text = "MODO CONTINUO ACTIVO"
-                    elif series_mode:
-                        status_text = f"SERIE: {series_count}/5"
-                    
-                    cv2.putText(frame_bgr, status_text, (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.putText(frame_bgr, f"Capturas: {capture_count}", (10, 70), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                    cv2.putText(frame_bgr, f"Res: {frame.shape[1]}x{frame.shape[0]}", 
-                               (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # Mostrar vista previa (redimensionada para pantalla)
-                    preview = cv2.resize(frame_bgr, (960, 540))  # 50% del tamaño original
-                    cv2.imshow("OAK-4W Captura de Imágenes", preview)
-                    
-                    key = cv2.waitKey(1) & 0xFF
+                    # Vista BGR sin copia sobre el buffer del mensaje
+                    # (getCvFrame copiaría ~0.7 MB por frame); in_rgb
+                    # sigue vivo durante toda la iteración
+                    try:
+                        frame_bgr = np.frombuffer(
+                            in_rgb.getData(), dtype=np.uint8).reshape(360, 640, 3)
+                    except (ValueError, TypeError):
+                        frame_bgr = in_rgb.getCvFrame()
+
+                    # Recoger stills ya disparados y mandarlos al guardador
+                    in_still = q_still.tryGet()
+                    if in_still is not None and pendientes:
+                        _encolar_captura(in_still.getCvFrame(), pendientes.pop(0),
+                                         msg=in_still)
+
+                    # Conservar el paquete MJPEG más reciente del
+                    # codificador hardware (capturas continuo/serie)
+                    pkt = q_mjpeg.tryGet()
+                    while pkt is not None:
+                        ultimo_mjpeg = pkt
+                        pkt = q_mjpeg.tryGet()
+
+                    if sin_pantalla:
+                        try:
+                            key = teclas_stdin.get_nowait()
+                        except queue.Empty:
+                            key = 255
+                    else:
+                        key = cv2.waitKey(1) & 0xFF
                     current_time = time.time()
-                    
+
+                    # Camino rápido: en plena ráfaga (continuo/serie) y sin
+                    # tecla pulsada, el único consumidor del frame es el
+                    # guardado; el HUD y el imshow se refrescan como mucho
+                    # a 5 Hz en vez de en cada frame
+                    en_rafaga = estado.continuo or estado.serie
+                    mostrar = (not sin_pantalla
+                               and (not en_rafaga or key != 255
+                                    or current_time - estado.ultimo_refresco >= 0.2))
+
+                    if mostrar:
+                        # Agregar información de estado
+                        status_text = "LISTO PARA CAPTURAR"
+                        if estado.continuo:
+                            status_text = "MODO CONTINUO ACTIVO"
+                        elif estado.serie:
+                            status_text = f"SERIE: {estado.serie_num}/5"
+
+                        # El preview ya llega del ISP al tamaño de pantalla:
+                        # no hay que reescalar nada en el host
+                        preview = frame_bgr
+
+                        # El HUD se dibuja SOLO sobre el preview (el JPEG
+                        # guardado queda limpio, sale del stream still) y se
+                        # compone desde el parche cacheado
+                        estado_hud = (status_text, estado.capturas)
+                        if estado_hud != hud_estado_prev:
+                            hud_patch = np.zeros((130, 520, 3), dtype=np.uint8)
+                            cv2.putText(hud_patch, status_text, (10, 30),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                            cv2.putText(hud_patch, f"Capturas: {estado.capturas}", (10, 70),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                            cv2.putText(hud_patch, "Res captura: 1920x1080",
+                                       (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                            hud_estado_prev = estado_hud
+                        roi_hud = preview[:130, :520]
+                        cv2.add(roi_hud, hud_patch, dst=roi_hud)
+
+                        cv2.imshow("OAK-4W Captura de Imágenes", preview)
+                        estado.ultimo_refresco = current_time
+
+
                     # Capturar imagen individual
                     if key == ord(' '):  # Espacio
-                        capture_count += 1
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+                        estado.capturas += 1
+                        timestamp = _marca_tiempo()
                         filename = os.path.join(output_dir, f"imagen_{timestamp}.jpg")
-                        
-                        # Guardar imagen a resolución completa
-                        cv2.imwrite(filename, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                        print(f"✓ Imagen {capture_count} guardada: {filename}")
-                    
+
+                        # Pedir un still a resolución completa a la cámara;
+                        # llega por su propia cola y se guarda en el hilo de fondo
+                        _disparar_still(filename)
+                        print(f"✓ Imagen {estado.capturas} solicitada: {filename}")
+
                     # Modo continuo
                     elif key == ord('c'):
-                        continuous_mode = not continuous_mode
-                        print(f"Modo continuo: {'ACTIVADO' if continuous_mode else 'DESACTIVADO'}")
-                    
+                        estado.continuo = not estado.continuo
+                        print(f"Modo continuo: {'ACTIVADO' if estado.continuo else 'DESACTIVADO'}")
+
                     # Serie de imágenes
                     elif key == ord('s'):
-                        if not series_mode:
-                            series_mode = True
-                            series_count = 0
+                        if not estado.serie:
+                            estado.serie = True
+                            estado.serie_num = 0
+                            serie_paquetes = []
+                            serie_filename = os.path.join(
+                                output_dir, f"serie_{_marca_tiempo()}.mjpeg")
                             print("Iniciando serie de 5 imágenes...")
                     
                     # Salir
@@ -120,29 +370,41 @@ def capture_and_save():
                         break
                     
                     # Captura automática en modo continuo
-                    if continuous_mode and current_time - last_capture_time >= 2.0:
-                        capture_count += 1
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+                    if estado.continuo and _toca_disparo(current_time,
+                                                         estado.ultima_captura, 2.0):
+                        estado.capturas += 1
+                        timestamp = _marca_tiempo()
                         filename = os.path.join(output_dir, f"continua_{timestamp}.jpg")
-                        
-                        cv2.imwrite(filename, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                        print(f"📸 Captura automática {capture_count}: {filename}")
-                        last_capture_time = current_time
+
+                        # JPEG ya comprimido por el hardware de la cámara:
+                        # solo hay que escribir los bytes a disco
+                        if ultimo_mjpeg is not None:
+                            _encolar_bytes(bytes(ultimo_mjpeg.getData()), filename)
+                        else:
+                            _disparar_still(filename)
+                        print(f"📸 Captura automática {estado.capturas}: {filename}")
+                        estado.ultima_captura = current_time
                     
-                    # Serie de imágenes
-                    if series_mode and current_time - last_capture_time >= 1.0:
-                        series_count += 1
-                        capture_count += 1
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-                        filename = os.path.join(output_dir, f"serie_{series_count}_{timestamp}.jpg")
-                        
-                        cv2.imwrite(filename, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                        print(f"📷 Serie {series_count}/5: {filename}")
-                        last_capture_time = current_time
-                        
-                        if series_count >= 5:
-                            series_mode = False
-                            print("✓ Serie completada!")
+                    # Serie de imágenes: los paquetes MJPEG se acumulan y
+                    # la serie completa se escribe como un único archivo
+                    # contiguo (una apertura, una escritura, un sync de
+                    # metadatos en vez de cinco)
+                    if estado.serie and _toca_disparo(current_time,
+                                                      estado.ultima_captura, 1.0):
+                        if ultimo_mjpeg is not None:
+                            estado.serie_num += 1
+                            estado.capturas += 1
+                            serie_paquetes.append(bytes(ultimo_mjpeg.getData()))
+                            print(f"📷 Serie {estado.serie_num}/5")
+                        else:
+                            print("⚠️ Aún sin paquete MJPEG; reintentando...")
+                        estado.ultima_captura = current_time
+
+                        if estado.serie_num >= 5:
+                            estado.serie = False
+                            _encolar_bytes(b"".join(serie_paquetes), serie_filename)
+                            print(f"✓ Serie completada: {serie_filename}")
+                            serie_paquetes = []
     
     except RuntimeError as e:
         print(f"❌ Error al conectar con la cámara: {e}")
@@ -154,9 +416,11 @@ def capture_and_save():
         return None
     
     finally:
+        # Esperar a que terminen los guardados pendientes
+        encode_q.join()
         cv2.destroyAllWindows()
-        print(f"\n✓ Sesión finalizada. Total de imágenes capturadas: {capture_count}")
-        if capture_count > 0:
+        print(f"\n✓ Sesión finalizada. Total de imágenes capturadas: {estado.capturas}")
+        if estado.capturas > 0:
             print(f"📁 Imágenes guardadas en: {os.path.abspath(output_dir)}")
 
 if __name__ == "__main__":
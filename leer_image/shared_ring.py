@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+Anillo SPSC (un productor, un consumidor) en memoria compartida para
+publicar frames a visores que corren en el mismo host.
+
+Cuando el visor vive en la misma máquina que el proceso que habla con
+la cámara, serializar cada frame por XLink/sockets es trabajo perdido:
+aquí la publicación es un único memcpy a memoria mapeada y el visor lee
+directamente, sin marshalling de IPC.
+
+Disposición del segmento compartido:
+    [0:8)    índice de cabeza (uint64, lo incrementa solo el productor)
+    [8:16)   número de slots (uint64)
+    [16:...) slots contiguos de frame_bytes cada uno
+"""
+
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_CABECERA = 16
+
+class SharedRing:
+    """
+    Anillo de frames en memoria compartida con semántica
+    "solo la imagen más reciente".
+
+    El productor escribe el frame en el siguiente slot y después publica
+    el índice de cabeza; el consumidor lee la cabeza y toma el slot
+    anterior, por lo que nunca observa un frame a medio escribir mientras
+    el productor no le saque una vuelta completa.
+    """
+
+    def __init__(self, name, frame_bytes, slots=4, create=True):
+        self.name = name
+        self.frame_bytes = int(frame_bytes)
+        self.slots = int(slots)
+        total = _CABECERA + self.slots * self.frame_bytes
+        self._es_productor = create
+        if create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+            except FileExistsError:
+                # Quedó un segmento de una sesión anterior: reutilizarlo
+                # solo si su tamaño alcanza para esta geometría; si era
+                # de un frame/slots más pequeño, publicar() reventaría al
+                # construir la vista sobre el buffer. En ese caso se
+                # elimina y se crea de nuevo con el tamaño correcto.
+                self.shm = shared_memory.SharedMemory(name=name)
+                if self.shm.size < total:
+                    self.shm.close()
+                    self.shm.unlink()
+                    self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                          size=total)
+            struct.pack_into("<QQ", self.shm.buf, 0, 0, self.slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    def publicar(self, frame):
+        """Copia el frame al siguiente slot y publica la nueva cabeza."""
+        cabeza = struct.unpack_from("<Q", self.shm.buf, 0)[0]
+        idx = cabeza % self.slots
+        offset = _CABECERA + idx * self.frame_bytes
+        destino = np.ndarray(frame.shape, dtype=frame.dtype,
+                             buffer=self.shm.buf, offset=offset)
+        np.copyto(destino, frame)
+        # La cabeza se publica después de copiar los datos
+        struct.pack_into("<Q", self.shm.buf, 0, cabeza + 1)
+
+    def ultimo(self, shape, dtype=np.uint8):
+        """
+        Devuelve una vista (sin copia) del último frame publicado,
+        o None si el productor aún no escribió ninguno.
+        """
+        cabeza = struct.unpack_from("<Q", self.shm.buf, 0)[0]
+        if cabeza == 0:
+            return None
+        idx = (cabeza - 1) % self.slots
+        offset = _CABECERA + idx * self.frame_bytes
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+
+    def cerrar(self):
+        """Libera el mapeo; el productor además elimina el segmento."""
+        self.shm.close()
+        if self._es_productor:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass